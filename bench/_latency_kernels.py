@@ -0,0 +1,31 @@
+"""
+Numba kernels for visualize_latency.py.
+
+Kept in their own module so numba is only imported (and the compiled kernel
+only loaded from cache) when a series is large enough to benefit.
+"""
+
+import math
+
+import numpy as np
+from numba import njit
+
+
+@njit(fastmath=True, cache=True)
+def rolling_std(rtts, window):
+    """Standard deviation of each trailing window rtts[i-window:i], for i >= window."""
+    n = rtts.shape[0]
+    out = np.empty(n - window)
+    s = 0.0
+    s2 = 0.0
+    for i in range(window):
+        s += rtts[i]
+        s2 += rtts[i] * rtts[i]
+
+    # Slide the window: add the sample entering, drop the one leaving
+    for i in range(window, n):
+        mean = s / window
+        out[i - window] = math.sqrt(max(s2 / window - mean * mean, 0.0))
+        s += rtts[i] - rtts[i - window]
+        s2 += rtts[i] * rtts[i] - rtts[i - window] * rtts[i - window]
+    return out
@@ -0,0 +1,46 @@
+"""
+Numba kernels for analyze_trace.py.
+
+Kept in their own module so numba is only imported (and the compiled kernel
+only loaded from cache) when a trace is large enough to benefit.
+"""
+
+import numpy as np
+from numba import get_num_threads, njit, prange
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def _parallel_pass(d_us, edges, fine_bins, nthreads):
+    n = d_us.shape[0]
+    nbins = edges.shape[0] - 1
+    fine_limit = fine_bins - 0.5
+    chunk = (n + nthreads - 1) // nthreads
+
+    # Private accumulators per thread, reduced at the end: no atomics needed
+    sums = np.zeros(nthreads)
+    mins = np.full(nthreads, np.inf)
+    maxs = np.full(nthreads, -np.inf)
+    local = np.zeros((nthreads, nbins), np.int64)
+    fine = np.zeros((nthreads, fine_bins), np.int32)
+    for t in prange(nthreads):
+        s, mn, mx = 0.0, np.inf, -np.inf
+        for i in range(t * chunk, min(n, (t + 1) * chunk)):
+            x = d_us[i]
+            s += x
+            mn = min(mn, x)
+            mx = max(mx, x)
+            b = np.searchsorted(edges, x, side='right') - 1
+            local[t, min(max(b, 0), nbins - 1)] += 1
+            if x < fine_limit:
+                fine[t, int(x + 0.5)] += 1
+        sums[t], mins[t], maxs[t] = s, mn, mx
+
+    return sums.sum(), mins.min(), maxs.max(), local.sum(axis=0), fine.sum(axis=0)
+
+
+def parallel_pass(d_us, edges, fine_bins):
+    """Sum, min, max, bucket counts over edges and 1 µs fine histogram of d_us."""
+    # Each thread zeroes and reduces its own fine_bins table; only add a thread
+    # once it has at least a table's worth of samples to count
+    nthreads = min(get_num_threads(), max(1, len(d_us) // fine_bins))
+    return _parallel_pass(d_us, edges, fine_bins, nthreads)
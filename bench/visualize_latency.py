@@ -13,131 +13,183 @@ Usage:
 """
 
 import argparse
+import importlib.util
+import mmap
+import os
 import re
 import sys
 from collections import defaultdict
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 
 # Try to import matplotlib, provide helpful message if not available
 try:
+    import matplotlib
     import matplotlib.pyplot as plt
     import matplotlib.dates as mdates
     HAS_MATPLOTLIB = True
+
+    # Let Agg drop sub-pixel path vertices instead of rasterizing every point
+    plt.rcParams.update({
+        'path.simplify': True,
+        'path.simplify_threshold': 1.0,
+        'agg.path.chunksize': 10000,
+    })
 except ImportError:
     HAS_MATPLOTLIB = False
 
+# Hyperscan is optional; it triages candidate lines with a SIMD literal scan
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
+# Time-series panels are decimated to roughly this many points per series
+MAX_PLOT_POINTS = 5000
 
-@dataclass
-class RTTSample:
-    timestamp: datetime
-    rtt_us: float  # microseconds
-    target: str
-
-
-def parse_duration(s: str) -> float:
-    """Parse duration string like '123.45µs' or '1.23ms' to microseconds."""
-    s = s.strip()
-    if s.endswith('µs'):
-        return float(s[:-2])
-    elif s.endswith('us'):
-        return float(s[:-2])
-    elif s.endswith('ns'):
-        return float(s[:-2]) / 1000
-    elif s.endswith('ms'):
-        return float(s[:-2]) * 1000
-    elif s.endswith('s'):
-        return float(s[:-1]) * 1_000_000
-    else:
-        return float(s)
-
-
-def parse_log_file(filename: str) -> List[RTTSample]:
-    """Parse a SWIM node log file and extract RTT samples."""
-    samples = []
-
-    # Pattern for log lines with RTT
-    # Example: 2024-01-15T10:30:45.123456Z  INFO swim_rs::protocol::node: Received ACK seq=5 from 127.0.0.1:9001 (RTT: 234.56µs)
-    rtt_pattern = re.compile(
-        r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?)\s+\w+\s+.*?'
-        r'Received ACK.*?from\s+([\d.:]+)\s+\(RTT:\s*([^\)]+)\)'
-    )
-
-    # Also try simpler pattern without timestamp
-    simple_pattern = re.compile(
-        r'Received ACK.*?from\s+([\d.:]+)\s+\(RTT:\s*([^\)]+)\)'
-    )
-
-    with open(filename, 'r') as f:
-        line_num = 0
-        for line in f:
-            line_num += 1
-
-            match = rtt_pattern.search(line)
-            if match:
-                try:
-                    ts_str = match.group(1)
-                    # Handle various timestamp formats
-                    if ts_str.endswith('Z'):
-                        ts_str = ts_str[:-1]
-                    if '.' in ts_str:
-                        ts = datetime.fromisoformat(ts_str)
-                    else:
-                        ts = datetime.fromisoformat(ts_str)
-
-                    target = match.group(2)
-                    rtt_str = match.group(3)
-                    rtt_us = parse_duration(rtt_str)
-
-                    samples.append(RTTSample(
-                        timestamp=ts,
-                        rtt_us=rtt_us,
-                        target=target
-                    ))
-                except (ValueError, IndexError) as e:
-                    pass  # Skip malformed lines
-            else:
-                # Try simple pattern
-                match = simple_pattern.search(line)
-                if match:
-                    try:
-                        target = match.group(1)
-                        rtt_str = match.group(2)
-                        rtt_us = parse_duration(rtt_str)
-
-                        samples.append(RTTSample(
-                            timestamp=datetime.now(),  # Use current time if no timestamp
-                            rtt_us=rtt_us,
-                            target=target
-                        ))
-                    except (ValueError, IndexError):
-                        pass
-
-    return samples
-
-
-def print_statistics(samples: List[RTTSample], filename: str):
-    """Print statistics to console."""
-    if not samples:
-        print(f"No RTT samples found in {filename}")
+# Series shorter than this keep the NumPy rolling jitter. Importing numba and
+# loading the cached kernel costs ~0.5 s, while the kernel saves only ~30 ns
+# per sample over the prefix-sum version, so it pays off only for huge series.
+NUMBA_MIN_SIZE = 20_000_000
+
+_rolling_std_kernel = None  # numba kernel, loaded on first huge series; False if unavailable
+
+
+# Pattern for log lines with RTT. It starts with a literal so the regex engine
+# can skip straight to candidate lines; the timestamp is matched separately.
+# Example: 2024-01-15T10:30:45.123456Z  INFO swim_rs::protocol::node: Received ACK seq=5 from 127.0.0.1:9001 (RTT: 234.56µs)
+_RTT_RE = re.compile(
+    rb'Received ACK.*?from[ \t]+([\d.:]+)[ \t]+'
+    rb'\(RTT:[ \t]*(\d+(?:\.\d+)?)[ \t]*(\xc2\xb5s|us|ns|ms|s|)\)'
+)
+
+# Literal every RTT line contains; _RTT_RE starts with it
+_TRIAGE_LITERAL = b'Received ACK'
+
+if HAS_HYPERSCAN:
+    _TRIAGE_DB = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    _TRIAGE_DB.compile(expressions=[_TRIAGE_LITERAL], ids=[0], elements=1, flags=[0])
+
+# Timestamp prefix at the start of a log line
+_TS_RE = re.compile(
+    rb'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?)Z?[ \t]+\w+[ \t]+'
+)
+
+
+# RTT unit suffix (Rust Duration Debug format) -> microseconds; bare numbers are µs
+_UNIT_SCALE = {b'ns': 1e-3, b'ms': 1e3, b's': 1e6}
+
+
+def _rtt_matches(buf):
+    """Yield _RTT_RE matches in buf, letting Hyperscan locate candidates when available."""
+    if not HAS_HYPERSCAN:
+        yield from _RTT_RE.finditer(buf)
         return
 
-    rtts = [s.rtt_us for s in samples]
-    rtts_sorted = sorted(rtts)
+    ends = []
+    _TRIAGE_DB.scan(buf, match_event_handler=lambda _id, _from, to, _flags, _ctx: ends.append(to))
+
+    # Python re only runs the capture, anchored at each hit. Like finditer,
+    # skip hits inside the previous match so a repeated literal on one line
+    # doesn't yield a second sample.
+    last_end = 0
+    for end in ends:
+        start = end - len(_TRIAGE_LITERAL)
+        if start < last_end:
+            continue
+        match = _RTT_RE.match(buf, start)
+        if match:
+            last_end = match.end()
+            yield match
+
+
+def _parse_timestamps(raw: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert ISO-8601 byte strings to datetime64[us] ('' -> NaT).
+
+    Returns the timestamps and a mask of rows to keep; a malformed timestamp
+    (e.g. Feb 30) rejects its row instead of the whole file.
+    """
+    # Decode before casting: a failing S -> datetime64 cast can crash NumPy
+    # instead of raising, the U -> datetime64 cast raises ValueError cleanly
+    raw = raw.astype('U32')
+    try:
+        return raw.astype('datetime64[us]'), np.ones(len(raw), dtype=bool)
+    except ValueError:
+        pass
+
+    # Rare slow path: retry one by one to find the bad rows
+    ts = np.full(len(raw), np.datetime64('NaT'), dtype='datetime64[us]')
+    valid = np.ones(len(raw), dtype=bool)
+    for i, stamp in enumerate(raw):
+        if stamp:
+            try:
+                ts[i] = np.datetime64(stamp, 'us')
+            except ValueError:
+                valid[i] = False  # Skip malformed lines
+    return ts, valid
+
+
+def parse_log_file(filename: str) -> Dict[str, np.ndarray]:
+    """Parse a SWIM node log file and extract RTT samples.
+
+    Returns a dict of equal-length columns: 'timestamp' (datetime64[us]),
+    'rtt_us' (float64 microseconds) and 'target' (peer address).
+    """
+    timestamps = []
+    values = []
+    units = []
+    targets = []
+
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > 0:
+            # Scan the mapped file in one go; only matching lines are ever decoded
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for match in _rtt_matches(mm):
+                    target, value, unit = match.groups()
+                    ts_match = _TS_RE.match(mm, mm.rfind(b'\n', 0, match.start()) + 1)
+
+                    # Raw ISO-8601 bytes; converted in one batch below (b'' -> NaT)
+                    timestamps.append(ts_match.group(1) if ts_match else b'')
+                    values.append(value)
+                    units.append(unit)
+                    targets.append(target)
+
+    ts, valid = _parse_timestamps(np.array(timestamps, dtype='S32'))
+    ts[np.isnat(ts)] = np.datetime64(datetime.now(), 'us')  # Use current time if no timestamp
+
+    # Scale each unit group with one broadcast multiply instead of per-sample branching
+    units = np.array(units, dtype='S3')
+    rtt_us = np.array(values, dtype='S32').astype(np.float64)
+    for unit, scale in _UNIT_SCALE.items():
+        rtt_us[units == unit] *= scale
+
+    return {
+        'timestamp': ts[valid],
+        'rtt_us': rtt_us[valid],
+        'target': np.array(targets, dtype='S22').astype('U22')[valid],
+    }
+
+
+def print_statistics(samples: Dict[str, np.ndarray], filename: str):
+    """Print statistics to console."""
+    rtts = samples['rtt_us']
     n = len(rtts)
+    if n == 0:
+        print(f"No RTT samples found in {filename}")
+        return
 
-    mean = sum(rtts) / n
-    p50 = rtts_sorted[n // 2]
-    p95 = rtts_sorted[int(n * 0.95)]
-    p99 = rtts_sorted[min(int(n * 0.99), n - 1)]
-    min_rtt = rtts_sorted[0]
-    max_rtt = rtts_sorted[-1]
+    # One O(n) partition yields every order statistic we report
+    ks = np.array([0, n // 2, int(n * 0.95), min(int(n * 0.99), n - 1), n - 1])
+    min_rtt, p50, p95, p99, max_rtt = np.partition(rtts, ks)[ks]
+    mean = rtts.mean()
 
     # Jitter (standard deviation)
-    variance = sum((x - mean) ** 2 for x in rtts) / n
-    jitter = variance ** 0.5
+    jitter = rtts.std()
 
     print(f"\n{'=' * 60}")
     print(f"RTT Statistics: {filename}")
@@ -154,18 +206,13 @@ def print_statistics(samples: List[RTTSample], filename: str):
 
     # ASCII histogram
     print("RTT Distribution:")
-    buckets = [0, 50, 100, 200, 500, 1000, 2000, 5000, float('inf')]
+    buckets = np.array([0, 50, 100, 200, 500, 1000, 2000, 5000], dtype=np.float64)
     bucket_names = ['0-50µs', '50-100µs', '100-200µs', '200-500µs',
                    '500µs-1ms', '1-2ms', '2-5ms', '>5ms']
-    counts = [0] * (len(buckets) - 1)
-
-    for rtt in rtts:
-        for i in range(len(buckets) - 1):
-            if buckets[i] <= rtt < buckets[i + 1]:
-                counts[i] += 1
-                break
+    idx = np.searchsorted(buckets, rtts, side='right') - 1
+    counts = np.bincount(idx.clip(0, len(bucket_names) - 1), minlength=len(bucket_names))
 
-    max_count = max(counts) if counts else 1
+    max_count = counts.max()
     bar_width = 40
 
     for name, count in zip(bucket_names, counts):
@@ -175,6 +222,41 @@ def print_statistics(samples: List[RTTSample], filename: str):
         print(f"  {name:>12}: {bar:<40} {count:>5} ({pct:>5.1f}%)")
 
 
+def _load_kernels():
+    """Import _latency_kernels from next to this file, however the script was started."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_latency_kernels.py')
+    spec = importlib.util.spec_from_file_location('_latency_kernels', path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered by name: numba's cache re-imports the module when it loads a kernel
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def rolling_std(rtts: np.ndarray, window: int) -> np.ndarray:
+    """Standard deviation of each trailing window rtts[i-window:i], for i >= window."""
+    global _rolling_std_kernel
+    if len(rtts) >= NUMBA_MIN_SIZE:
+        if _rolling_std_kernel is None:
+            try:
+                _rolling_std_kernel = _load_kernels().rolling_std
+            except ImportError as e:
+                if e.name != 'numba':
+                    raise
+                _rolling_std_kernel = False  # numba is optional
+        if _rolling_std_kernel:
+            return _rolling_std_kernel(rtts, window)
+
+    # Prefix sums turn every window sum into one subtraction: var = E[x²] - E[x]²
+    c1 = np.concatenate(([0.0], np.cumsum(rtts)))
+    c2 = np.concatenate(([0.0], np.cumsum(rtts * rtts)))
+    s1 = c1[window:-1] - c1[:-window - 1]
+    s2 = c2[window:-1] - c2[:-window - 1]
+    mean = s1 / window
+    variance = s2 / window - mean * mean
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
 def plot_latency(all_samples: dict, output_file: Optional[str] = None):
     """Generate matplotlib visualization."""
     if not HAS_MATPLOTLIB:
@@ -183,6 +265,10 @@ def plot_latency(all_samples: dict, output_file: Optional[str] = None):
         print("\nSkipping graphical visualization.")
         return
 
+    if output_file:
+        # Rendering straight to a file: skip the interactive GUI backend
+        matplotlib.use('Agg')
+
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     fig.suptitle('SWIM Protocol Latency Analysis', fontsize=14, fontweight='bold')
 
@@ -191,10 +277,11 @@ def plot_latency(all_samples: dict, output_file: Optional[str] = None):
     # 1. RTT over time
     ax1 = axes[0, 0]
     for idx, (name, samples) in enumerate(all_samples.items()):
-        if samples:
-            times = range(len(samples))
-            rtts = [s.rtt_us for s in samples]
-            ax1.plot(times, rtts, 'o-', markersize=2, alpha=0.7,
+        rtts = samples['rtt_us']
+        if len(rtts):
+            times = np.arange(len(rtts))
+            stride = max(1, len(rtts) // MAX_PLOT_POINTS)
+            ax1.plot(times[::stride], rtts[::stride], 'o-', markersize=2, alpha=0.7,
                     color=colors[idx % len(colors)], label=name)
     ax1.set_xlabel('Sample #')
     ax1.set_ylabel('RTT (µs)')
@@ -204,10 +291,19 @@ def plot_latency(all_samples: dict, output_file: Optional[str] = None):
 
     # 2. RTT distribution (histogram)
     ax2 = axes[0, 1]
+    nb = 50
     for idx, (name, samples) in enumerate(all_samples.items()):
-        if samples:
-            rtts = [s.rtt_us for s in samples]
-            ax2.hist(rtts, bins=50, alpha=0.5, label=name, color=colors[idx % len(colors)])
+        rtts = samples['rtt_us']
+        if len(rtts):
+            # Uniform bins: the bin index is a scaled offset, no binary search needed
+            lo, hi = rtts.min(), rtts.max()
+            width = (hi - lo) / nb if hi > lo else 1.0
+            bins = ((rtts - lo) / width).astype(np.intp)
+            bins.clip(0, nb - 1, out=bins)
+            counts = np.bincount(bins, minlength=nb)
+            edges = lo + width * np.arange(nb)
+            ax2.bar(edges, counts, width=width, align='edge', alpha=0.5,
+                    label=name, color=colors[idx % len(colors)])
     ax2.set_xlabel('RTT (µs)')
     ax2.set_ylabel('Frequency')
     ax2.set_title('RTT Distribution')
@@ -217,10 +313,10 @@ def plot_latency(all_samples: dict, output_file: Optional[str] = None):
     # 3. CDF
     ax3 = axes[1, 0]
     for idx, (name, samples) in enumerate(all_samples.items()):
-        if samples:
-            rtts = sorted([s.rtt_us for s in samples])
-            cdf = [i / len(rtts) for i in range(1, len(rtts) + 1)]
-            ax3.plot(rtts, cdf, '-', linewidth=2,
+        rtts = samples['rtt_us']
+        if len(rtts):
+            cdf = np.arange(1, len(rtts) + 1) / len(rtts)
+            ax3.plot(np.sort(rtts), cdf, '-', linewidth=2,
                     color=colors[idx % len(colors)], label=name)
     ax3.set_xlabel('RTT (µs)')
     ax3.set_ylabel('CDF')
@@ -235,15 +331,10 @@ def plot_latency(all_samples: dict, output_file: Optional[str] = None):
     ax4 = axes[1, 1]
     window = 20
     for idx, (name, samples) in enumerate(all_samples.items()):
-        if len(samples) > window:
-            rtts = [s.rtt_us for s in samples]
-            jitters = []
-            for i in range(window, len(rtts)):
-                window_data = rtts[i-window:i]
-                mean = sum(window_data) / window
-                variance = sum((x - mean) ** 2 for x in window_data) / window
-                jitters.append(variance ** 0.5)
-            ax4.plot(range(window, len(rtts)), jitters, '-', linewidth=1,
+        rtts = samples['rtt_us']
+        if len(rtts) > window:
+            jitters = rolling_std(rtts, window)
+            ax4.plot(np.arange(window, len(rtts)), jitters, '-', linewidth=1,
                     color=colors[idx % len(colors)], label=name, alpha=0.7)
     ax4.set_xlabel('Sample #')
     ax4.set_ylabel('Jitter (µs)')
@@ -270,16 +361,29 @@ def main():
 
     all_samples = {}
 
+    paths = []
     for filename in args.files:
         path = Path(filename)
         if not path.exists():
             print(f"Warning: {filename} not found, skipping")
             continue
+        paths.append(path)
+
+    if not paths:
+        return
+
+    if len(paths) == 1:
+        # Nothing to overlap: skip the worker start-up and pickling the columns back
+        parsed = [parse_log_file(str(paths[0]))]
+    else:
+        # Parsing is CPU-bound and independent per file: one worker process per file
+        with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as pool:
+            parsed = list(pool.map(parse_log_file, [str(p) for p in paths]))
 
-        samples = parse_log_file(filename)
+    for path, samples in zip(paths, parsed):
         print_statistics(samples, path.name)
 
-        if samples:
+        if len(samples['rtt_us']):
             # Use just the filename as the label
             all_samples[path.stem] = samples
 